@@ -1,36 +1,310 @@
 import streamlit as st
 import advertools as adv
+import crawler_worker
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import tempfile
 import os
+import io
 import json
+import hashlib
+import pathlib
+from urllib.parse import urlsplit
+import orjson
 import multiprocessing # NEW: For running the crawl in a separate process
-import time # NEW: For polling the output file
+import signal
+import threading
+import time
+from collections.abc import Iterator
+
+try:
+    # Optional: wakes the live monitor on file writes instead of polling
+    from watchfiles import watch
+except ImportError:
+    watch = None
 
 # Set the page configuration for a wider layout
 st.set_page_config(layout="wide")
 
+# Compact pandas dtypes for the cached crawl columns: contiguous Arrow strings
+# for URLs and nullable 16-bit integers for status codes
+CRAWL_TYPES_MAPPER = {
+    pa.string(): pd.StringDtype('pyarrow'),
+    pa.large_string(): pd.StringDtype('pyarrow'),
+    pa.int16(): pd.Int16Dtype(),
+}.get
+
+# Finished crawls are cached on disk so server restarts and other sessions
+# can reuse them instead of crawling the same site again
+CRAWL_CACHE_DIR = pathlib.Path(__file__).parent / '.crawl_cache'
+CRAWL_CACHE_TTL_SECONDS = 24 * 60 * 60
+CRAWL_CACHE_MAX_ENTRIES = 32
+
+# Idle crawler workers kept warm for reuse; crawls beyond this many run in
+# parallel on freshly started workers
+CRAWLER_POOL_SIZE = 2
+
+# Live view redraw throttling: redraw after this many new rows or seconds,
+# showing only the most recently crawled rows
+LIVE_RENDER_MIN_NEW_ROWS = 50
+LIVE_RENDER_MAX_INTERVAL_SECONDS = 5
+LIVE_VIEW_ROWS = 500
+
+# Rows of the detailed report rendered at a time
+REPORT_PAGE_SIZE = 1000
+
+# Descriptions for common HTTP status codes shown in the summary table
+STATUS_DESCRIPTIONS = {
+    200: 'OK (Success)',
+    301: 'Moved Permanently (Redirect)',
+    302: 'Found (Temporary Redirect)',
+    404: 'Not Found',
+    500: 'Internal Server Error',
+}
+
+# Sorted lookup arrays built from STATUS_DESCRIPTIONS for vectorised matching
+_STATUS_KEYS = np.array(sorted(STATUS_DESCRIPTIONS), dtype=np.int64)
+_STATUS_VALUES = np.array([STATUS_DESCRIPTIONS[code] for code in _STATUS_KEYS], dtype=object)
+
+
+@st.cache_resource
+def get_crawler_pool():
+    """
+    Returns the idle crawler workers shared by all sessions, as a list of
+    `(process, conn)` pairs, and the lock guarding that list.
+    """
+    return [], threading.Lock()
+
+
+def _start_crawler_worker():
+    """Starts a crawler worker and returns it with the parent end of its job pipe."""
+    # The forkserver imports advertools once up front, so the worker is forked
+    # from a warm interpreter rather than a copy of the Streamlit server.
+    # Windows has no forkserver and falls back to spawn.
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(['crawler_worker'])
+    else:
+        ctx = multiprocessing.get_context('spawn')
+
+    parent_conn, child_conn = ctx.Pipe()
+    process = ctx.Process(target=crawler_worker.worker_loop, args=(child_conn,), daemon=True)
+    process.start()
+
+    # Only the worker holds the child end, so recv() fails once it exits
+    child_conn.close()
+    return process, parent_conn
+
+
+def _checkout_crawler_worker():
+    """
+    Takes a live idle worker from the pool, or starts a new one if none is
+    idle, so concurrent sessions crawl in parallel.
+    """
+    idle, lock = get_crawler_pool()
+    with lock:
+        while idle:
+            process, conn = idle.pop()
+            if process.is_alive():
+                return process, conn
+            conn.close()
+    return _start_crawler_worker()
+
+
+def _release_crawler_worker(process, conn):
+    """Returns a worker that finished its job to the pool, or shuts it down if the pool is full."""
+    idle, lock = get_crawler_pool()
+    with lock:
+        if process.is_alive() and len(idle) < CRAWLER_POOL_SIZE:
+            idle.append((process, conn))
+            return
+
+    # Closing the pipe ends the worker's job loop
+    conn.close()
+
+
+def _cancel_crawler_worker(process, conn):
+    """Kills a worker mid-crawl, along with the Scrapy subprocess it started, and closes its pipe."""
+    if hasattr(os, 'killpg'):
+        try:
+            # The worker leads its own process group (see crawler_worker.worker_loop)
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    process.terminate()
+    conn.close()
+
+
+def describe_status_codes(codes: np.ndarray) -> np.ndarray:
+    """
+    Returns the description of each status code in `codes`, or 'Other' for
+    codes not in STATUS_DESCRIPTIONS, using a binary search over the sorted keys.
+    """
+    idx = np.clip(np.searchsorted(_STATUS_KEYS, codes), 0, len(_STATUS_KEYS) - 1)
+    return np.where(_STATUS_KEYS[idx] == codes, _STATUS_VALUES[idx], 'Other')
+
+
+def _canonical_url(url: str) -> str:
+    """
+    Normalises `url` for use as a cache key, so variants that differ only in
+    scheme, host case, a leading 'www.' or a trailing slash share an entry.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix('www.')
+    path = parts.path.rstrip('/')
+    query = f'?{parts.query}' if parts.query else ''
+    return f'https://{host}{path}{query}'
+
+
+def _crawl_cache_path(start_url: str) -> pathlib.Path:
+    """Returns the parquet file a crawl of `start_url` is cached in."""
+    key = hashlib.sha1(_canonical_url(start_url).encode()).hexdigest()[:16]
+    return CRAWL_CACHE_DIR / f'{key}.parquet'
+
+
+def _load_cached_crawl(cache_path: pathlib.Path) -> tuple[pd.DataFrame, str | None] | None:
+    """
+    Returns the cached crawl and the start URL it was crawled from (None for
+    entries written without one) if it is younger than the TTL and was
+    written with the installed advertools version, otherwise None.
+    """
+    if not cache_path.exists():
+        return None
 
-# New function to run the blocking crawl in a separate process.
-# This target function prevents the main Streamlit thread from blocking.
-def _run_adv_crawl_target(start_url: str, temp_filepath: str):
-    """Target function for the multiprocessing Process."""
     try:
-        adv.crawl(
-            url_list=[start_url],
-            output_file=temp_filepath,
-            follow_links=True
+        mtime = cache_path.stat().st_mtime
+        if time.time() - mtime >= CRAWL_CACHE_TTL_SECONDS:
+            return None
+
+        metadata = pq.read_schema(cache_path).metadata or {}
+        if metadata.get(b'advertools_version') != adv.__version__.encode():
+            return None
+
+        # The access time records the last use for LRU eviction; the modification
+        # time is left alone since it dates the crawl for the TTL.
+        os.utime(cache_path, (time.time(), mtime))
+
+        table = pq.read_table(cache_path, columns=['url', 'status'])
+        cached_start_url = metadata.get(b'start_url')
+        return (
+            table.to_pandas(types_mapper=CRAWL_TYPES_MAPPER),
+            cached_start_url.decode() if cached_start_url else None,
         )
-    except Exception as e:
-        # In a real-time scenario, errors in the child process are logged
-        # and the main process will detect the failure when the file is incomplete.
-        print(f"Crawler process failed with error: {e}")
+
+    except pa.ArrowException as e:
+        # A truncated or corrupt entry is dropped and the site crawled again
+        print(f"Discarding unreadable cached crawl {cache_path}: {e}")
+        cache_path.unlink(missing_ok=True)
+        return None
+
+    except OSError as e:
+        print(f"Error reading cached crawl {cache_path}: {e}")
+        return None
+
+
+def _save_cached_crawl(cache_path: pathlib.Path, df: pd.DataFrame, start_url: str):
+    """
+    Writes the crawl to the cache, tagged with the advertools version and the
+    start URL as entered, and evicts the least recently used entries beyond
+    CRAWL_CACHE_MAX_ENTRIES.
+    """
+    table = pa.Table.from_pandas(df[['url', 'status']], preserve_index=False)
+    metadata = {
+        **(table.schema.metadata or {}),
+        b'advertools_version': adv.__version__.encode(),
+        b'start_url': start_url.encode(),
+    }
+
+    # Write to a temporary file first so readers never see a partial file
+    CRAWL_CACHE_DIR.mkdir(exist_ok=True)
+    tmp_path = cache_path.with_suffix('.parquet.tmp')
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path, compression='snappy')
+    os.replace(tmp_path, cache_path)
+
+    # Evict the least recently used crawls beyond the entry limit
+    entries = sorted(CRAWL_CACHE_DIR.glob('*.parquet'), key=lambda p: p.stat().st_atime, reverse=True)
+    for stale_path in entries[CRAWL_CACHE_MAX_ENTRIES:]:
+        stale_path.unlink(missing_ok=True)
+
+
+def _parse_record(line: bytes) -> dict | None:
+    """
+    Parses one JSONL record. Falls back to the stdlib parser for the NaN and
+    Infinity values Scrapy may write but orjson rejects; returns None and logs
+    the line if it still can't be parsed.
+    """
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        pass
+
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        print(f"Skipping unparseable crawl record: {e}")
+        return None
+
+
+def _read_new_rows(temp_filepath: str, last_offset: int, urls: list, statuses: list) -> int:
+    """
+    Parses the complete JSONL records appended to the file since `last_offset`
+    and appends their `url` and `status` values to `urls` and `statuses`.
+    Returns the offset of the first unconsumed byte.
+    """
+    with open(temp_filepath, 'rb') as fh:
+        fh.seek(last_offset)
+        chunk = fh.read()
+
+    # A trailing line without a newline is still being written; leave it
+    # for the next read.
+    consumed = chunk.rfind(b'\n') + 1
+    lines = [line for line in chunk[:consumed].splitlines() if line.strip()]
+
+    # Parse the whole batch as one JSON array in a single orjson call, falling
+    # back to line by line parsing if any record in it is rejected
+    try:
+        records = orjson.loads(b'[' + b','.join(lines) + b']')
+    except orjson.JSONDecodeError:
+        records = [record for record in map(_parse_record, lines) if record is not None]
+
+    urls.extend([r.get('url') for r in records])
+    statuses.extend([r.get('status') for r in records])
+    return last_offset + consumed
+
+
+def _wait_for_writes(temp_filepath: str, crawl_finished: threading.Event) -> Iterator[None]:
+    """
+    Yields each time the crawl output may have grown, until `crawl_finished`
+    is set. Uses filesystem notifications when watchfiles is installed and
+    falls back to polling every 500ms otherwise.
+    """
+    if watch is None:
+        while not crawl_finished.wait(0.5):
+            yield
+        return
+
+    # Also wake when nothing has been written for a while, so the live view's
+    # time-based redraw still fires during a stalled crawl
+    for _ in watch(
+        temp_filepath,
+        watch_filter=None,
+        stop_event=crawl_finished,
+        step=500,
+        rust_timeout=LIVE_RENDER_MAX_INTERVAL_SECONDS * 1000,
+        yield_on_timeout=True
+    ):
+        yield
+
 
 # The main processing function - removed @st.cache_data as it is incompatible with live updates
-def run_crawler_df(start_url: str) -> pd.DataFrame | None:
+def run_crawler_df(start_url: str, use_cache: bool = True) -> pd.DataFrame | None:
     """
     Runs the advertools web crawler in a background process and monitors
-    the output file to provide live updates to the Streamlit UI.
+    the output file to provide live updates to the Streamlit UI. A crawl of
+    the same URL cached on disk within the last 24 hours is returned instead
+    when `use_cache` is set.
     """
 
     # Ensure the URL is valid
@@ -38,6 +312,19 @@ def run_crawler_df(start_url: str) -> pd.DataFrame | None:
         st.error("Invalid URL: Please include 'http://' or 'https://'.")
         return None
 
+    cache_path = _crawl_cache_path(start_url)
+    if use_cache:
+        cached = _load_cached_crawl(cache_path)
+        if cached is not None:
+            cached_df, cached_start_url = cached
+            if cached_start_url == start_url:
+                st.info(f"Using a cached crawl of `{start_url}` from the last 24 hours.")
+            elif cached_start_url:
+                st.info(f"Using a cached crawl of the equivalent URL `{cached_start_url}` from the last 24 hours.")
+            else:
+                st.info(f"Using a cached crawl of a URL equivalent to `{start_url}` from the last 24 hours.")
+            return cached_df
+
     st.warning(
         f"Starting live, unlimited crawl for: `{start_url}`.\n\n"
         f"**WARNING:** The crawl is now **unlimited** in page count and depth, and it is configured to **follow internal links**. It relies on default settings to restrict to the hostname and respect `robots.txt`."
@@ -51,65 +338,109 @@ def run_crawler_df(start_url: str) -> pd.DataFrame | None:
     with tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False) as tmp:
         temp_filepath = tmp.name
 
-    # 2. Setup Streamlit placeholder for live updates
+    # 2. Setup Streamlit placeholders for live updates
+    live_count_placeholder = st.empty()
     live_report_placeholder = st.empty()
 
-    # 3. Start the crawl process
-    crawl_process = multiprocessing.Process(
-        target=_run_adv_crawl_target,
-        args=(start_url, temp_filepath)
-    )
-    crawl_process.start()
+    # 3. Hand the crawl to a warm worker process
+    worker_process, worker_conn = _checkout_crawler_worker()
+    crawl_finished = threading.Event()
+
+    def _wait_for_worker():
+        try:
+            worker_conn.recv()
+        except (EOFError, OSError):
+            # The worker died or was cancelled mid-crawl; the final read
+            # reports the missing output
+            pass
+        finally:
+            crawl_finished.set()
+
+    worker_conn.send((start_url, temp_filepath))
+    threading.Thread(target=_wait_for_worker, daemon=True).start()
 
     st.subheader("Live Crawl Status")
 
-    # 4. Monitoring Loop: Runs until the crawl process is finished
-    while crawl_process.is_alive():
-        # Check and update every 3 seconds
-        time.sleep(3)
+    # 4. Monitoring Loop: Runs until the worker reports the crawl is finished.
+    # Only the bytes appended since the previous check are read and parsed.
+    # The page count is refreshed on every wake, which also lets Streamlit's
+    # stop or rerun reach this loop during a stalled crawl. The table is only
+    # redrawn once enough new rows have arrived or enough time has passed,
+    # and only the most recent rows are sent to the browser.
+    # The crawl is kept as two column lists rather than a tuple per URL, and
+    # becomes the final frame once the crawl finishes.
+    urls = []
+    statuses = []
+    last_offset = 0
+    last_rendered_len = 0
+    last_render_ts = 0.0
+    monitor_completed = False
 
-        try:
-            data = []
-            if os.path.exists(temp_filepath) and os.path.getsize(temp_filepath) > 0:
-                with open(temp_filepath, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        data.append(json.loads(line))
+    try:
+        for _ in _wait_for_writes(temp_filepath, crawl_finished):
+            try:
+                last_offset = _read_new_rows(temp_filepath, last_offset, urls, statuses)
 
                 # Update the display
-                if data:
-                    current_df = pd.DataFrame(data)
-
+                new_rows = len(urls) - last_rendered_len
+                render_due = (
+                    new_rows >= LIVE_RENDER_MIN_NEW_ROWS
+                    or time.time() - last_render_ts >= LIVE_RENDER_MAX_INTERVAL_SECONDS
+                )
+                if new_rows > 0 and render_due:
                     # Prepare the data for the live view
-                    live_report_df = current_df[['url', 'status']].copy()
-                    live_report_df.rename(columns={'url': 'URL', 'status': 'HTTP Status Code'}, inplace=True)
+                    live_report_df = pd.DataFrame({
+                        'URL': urls[-LIVE_VIEW_ROWS:],
+                        'HTTP Status Code': statuses[-LIVE_VIEW_ROWS:],
+                    })
 
                     # Use the placeholder to update the UI section
-                    with live_report_placeholder.container():
-                        st.write(f"**Pages Crawled So Far:** {len(live_report_df)}")
-                        st.dataframe(live_report_df, use_container_width=True, hide_index=True)
+                    live_report_placeholder.dataframe(live_report_df, use_container_width=True, hide_index=True)
 
-        except Exception as e:
-            # Safely handle file access errors while the file is actively being written
-            print(f"Error reading partial file: {e}")
-            pass
+                    last_rendered_len = len(urls)
+                    last_render_ts = time.time()
 
-    # Wait for the process to fully terminate
-    crawl_process.join()
+            except Exception as e:
+                # Safely handle file access errors while the file is actively being written
+                print(f"Error reading partial file: {e}")
+                pass
 
-    # 5. After the process finishes, read the final results
+            live_count_placeholder.write(f"**Pages Crawled So Far:** {len(urls):,}")
+
+        monitor_completed = True
+    finally:
+        if crawl_finished.is_set():
+            _release_crawler_worker(worker_process, worker_conn)
+        else:
+            # The session was stopped or rerun mid-crawl, so stop the crawl too
+            _cancel_crawler_worker(worker_process, worker_conn)
+
+        # Step 5 removes the file after a normal finish; any other exit,
+        # such as a stop raised by the last render, has to remove it here
+        if not monitor_completed and os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+
+    # 5. After the process finishes, pick up whatever was written since the
+    # last check and build the final frame from the columns already parsed.
+    # A cut-off last line from a worker that died is left out.
     try:
         if os.path.exists(temp_filepath) and os.path.getsize(temp_filepath) > 0:
-            data = []
-            with open(temp_filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    data.append(json.loads(line))
-
-            df = pd.DataFrame(data)
+            last_offset = _read_new_rows(temp_filepath, last_offset, urls, statuses)
+            df = pd.DataFrame({
+                'url': pd.array(urls, dtype=pd.StringDtype('pyarrow')),
+                'status': pd.array(statuses, dtype='Int16'),
+            })
 
             # Check for empty or failed crawl data
-            if df.empty or 'status' not in df.columns or (df['status'] == 0).all():
+            if df.empty or (df['status'] == 0).all():
                  return pd.DataFrame()
 
+            try:
+                _save_cached_crawl(cache_path, df, start_url)
+            except OSError as e:
+                # A failed cache write shouldn't lose the finished crawl
+                print(f"Error caching crawl results: {e}")
+
             return df
         else:
              st.error("The crawler finished but produced no output file. Check terminal logs for process errors.")
@@ -125,6 +456,23 @@ def run_crawler_df(start_url: str) -> pd.DataFrame | None:
              os.remove(temp_filepath)
 
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_report_csv(report_df: pd.DataFrame) -> bytes:
+    """
+    Serialises the report straight to gzip-compressed UTF-8 CSV bytes. Level 1
+    gives most of the size reduction at a fraction of the default level's cost.
+    Cached so reruns of the page don't re-serialise an unchanged report.
+    """
+    buf = io.BytesIO()
+    report_df.to_csv(
+        buf,
+        index=False,
+        encoding='utf-8',
+        compression={'method': 'gzip', 'compresslevel': 1}
+    )
+    return buf.getvalue()
+
+
 def main():
     """Main Streamlit application function."""
 
@@ -138,6 +486,11 @@ def main():
         help="The crawl will be limited to this domain's hostname."
     )
 
+    use_cache = st.checkbox(
+        "Reuse a cached crawl of this URL from the last 24 hours",
+        value=True
+    )
+
     # 2. Crawl Button
     crawl_button = st.button("Start Crawl and Generate Report 🚀")
 
@@ -145,10 +498,15 @@ def main():
     if crawl_button and domain:
         # This will now start the live monitoring process
         with st.spinner("Crawl initiated. Starting process and monitoring output..."):
-            df_results = run_crawler_df(domain)
+            # Kept in session state by reference so the report survives reruns
+            # triggered by widget interactions without being re-serialised.
+            st.session_state['crawl_results'] = run_crawler_df(domain, use_cache)
 
+    df_results = st.session_state.get('crawl_results')
+
+    if df_results is not None:
         # After the live monitoring loop finishes, display the final, structured report
-        if df_results is not None and not df_results.empty:
+        if not df_results.empty:
             st.success(f"Crawl completed successfully. Found {len(df_results)} URLs.")
 
             # Filter the DataFrame to show only URL and status code
@@ -159,22 +517,15 @@ def main():
 
             st.subheader("Final HTTP Status Code Breakdown")
 
-            # Status Code Summary
-            status_summary = report_df['HTTP Status Code'].value_counts().reset_index()
-            status_summary.columns = ['HTTP Status Code', 'Count']
+            # Status Code Summary, counted on the raw status column
+            counts = df_results['status'].dropna().astype('int16').value_counts()
+            status_summary = pd.DataFrame({
+                'HTTP Status Code': counts.index.to_numpy(),
+                'Count': counts.to_numpy(),
+            })
 
             # Add a description for common status codes
-            def get_status_description(code):
-                descriptions = {
-                    200: 'OK (Success)',
-                    301: 'Moved Permanently (Redirect)',
-                    302: 'Found (Temporary Redirect)',
-                    404: 'Not Found',
-                    500: 'Internal Server Error',
-                }
-                return descriptions.get(code, 'Other')
-
-            status_summary['Description'] = status_summary['HTTP Status Code'].apply(get_status_description)
+            status_summary['Description'] = describe_status_codes(status_summary['HTTP Status Code'].to_numpy())
 
             st.dataframe(
                 status_summary,
@@ -186,8 +537,21 @@ def main():
             )
 
             st.subheader("Final Detailed URL Report")
+
+            # Only one page of rows is sent to the browser per rerun
+            start_row = 0
+            if len(report_df) > REPORT_PAGE_SIZE:
+                start_row = st.number_input(
+                    "Start row",
+                    min_value=0,
+                    max_value=len(report_df) - 1,
+                    value=0,
+                    step=REPORT_PAGE_SIZE
+                )
+            page_df = report_df.iloc[start_row:start_row + REPORT_PAGE_SIZE]
+
             st.dataframe(
-                report_df, 
+                page_df,
                 use_container_width=True,
                 hide_index=True,
                 column_config={
@@ -195,19 +559,25 @@ def main():
                     "HTTP Status Code": st.column_config.TextColumn(width="small"),
                 }
             )
+            if len(report_df) > REPORT_PAGE_SIZE:
+                st.caption(
+                    f"Showing rows {start_row + 1:,}-{start_row + len(page_df):,} of {len(report_df):,}. "
+                    "Download the CSV for the full report."
+                )
             
-            # Download button for the full results
-            csv_data = report_df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Download Full CSV Report",
-                data=csv_data,
-                file_name=f'crawl_report_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.csv',
-                mime='text/csv',
-            )
+            # Download button for the full results, only built on request
+            if st.button("Prepare CSV Download"):
+                csv_data = build_report_csv(report_df)
+                st.download_button(
+                    label="Download Full CSV Report (gzip)",
+                    data=csv_data,
+                    file_name=f'crawl_report_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.csv.gz',
+                    mime='application/gzip',
+                )
             
-        elif df_results is not None and df_results.empty:
+        else:
              st.warning("Crawl completed, but no internal URLs were found on the starting page.")
-        # Error case handled inside the run_crawler_df function
+    # Error case handled inside the run_crawler_df function
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,38 @@
+import os
+
+import advertools as adv
+
+# Sent back to the app once a crawl job has finished
+CRAWL_DONE = 'done'
+
+
+# Target function for the long-lived crawler process. It lives in its own
+# module so that a spawned child can import it by name; advertools is then
+# imported once per worker rather than once per crawl. Scrapy is still
+# imported per crawl, since adv.crawl runs it in a `scrapy runspider`
+# subprocess.
+def worker_loop(conn):
+    """Runs `(start_url, output_file)` crawl jobs received on `conn` until the pipe closes."""
+    # Lead a new process group so that cancelling a crawl can also stop the
+    # Scrapy subprocess started by adv.crawl
+    if hasattr(os, 'setsid'):
+        os.setsid()
+
+    while True:
+        try:
+            start_url, output_file = conn.recv()
+        except EOFError:
+            break
+
+        try:
+            adv.crawl(
+                url_list=[start_url],
+                output_file=output_file,
+                follow_links=True
+            )
+        except Exception as e:
+            # Errors are logged here and the app detects the failure when the
+            # output file is empty or incomplete.
+            print(f"Crawler process failed with error: {e}")
+
+        conn.send(CRAWL_DONE)